@@ -7,122 +7,207 @@ This module provides functions to read HIME's binary data files:
 - Generic tables (.gtab)
 """
 
+import mmap
+import pickle
 import struct
 import os
 from collections import namedtuple
+from functools import lru_cache
+from operator import itemgetter
 
 # Constants
 CH_SZ = 4  # Maximum UTF-8 character size used in HIME
 PHO_PHRASE_ESCAPE = 0x1B
 
+# Parsed-table sidecar cache; bump CACHE_VERSION when the parsed layout changes
+CACHE_SUFFIX = '.cache'
+CACHE_VERSION = 2
+
 # Data structures
 PhoIdx = namedtuple('PhoIdx', ['key', 'start'])
 PhoItem = namedtuple('PhoItem', ['ch', 'count'])
 KeyMapping = namedtuple('KeyMapping', ['num', 'typ'])  # typ: 0=initial, 1=medial, 2=final, 3=tone
 
+# gtab TableHead up to DefChars: version, flag, cname[32], selkey[12],
+# space_style, KeyS, MaxPress, M_DUP_SEL, DefChars
+TABLE_HEAD_FMT = '<II32s12sIIIII'
+
 # Phonetic segment bit lengths (from pho.c)
 TYP_PHO_LEN = [5, 2, 4, 3]  # Initial, medial, final, tone
 
 
-class PhoneticTable:
+def _decode_ch(ch_bytes):
+    """Decode a CH_SZ character cell, stripping null padding"""
+    ch_bytes = ch_bytes.rstrip(b'\x00')
+    try:
+        return ch_bytes.decode('utf-8')
+    except UnicodeDecodeError:
+        return ch_bytes.decode('latin-1')
+
+
+class _CachedTable:
+    """Mixin that persists parsed table state to a pickle sidecar file
+
+    The sidecar (<filepath>.cache) is keyed by the source file's size and
+    mtime; when it matches, the parse in _load() is skipped entirely.
+    Failing to read or write the sidecar (e.g. a read-only install
+    directory) silently falls back to parsing.
+    """
+
+    _cache_exclude = ('filepath',)
+
+    def _load_cached(self):
+        """Restore state from the sidecar if it is fresh, else _load()"""
+        cache_path = self.filepath + CACHE_SUFFIX
+        st = os.stat(self.filepath)
+        stamp = (CACHE_VERSION, st.st_size, st.st_mtime_ns)
+
+        try:
+            with open(cache_path, 'rb') as f:
+                cached_stamp, state = pickle.load(f)
+            if cached_stamp == stamp:
+                self.__dict__.update(state)
+                return
+        except Exception:
+            pass
+
+        self._load()
+
+        state = {k: v for k, v in self.__dict__.items()
+                 if k not in self._cache_exclude}
+        tmp_path = cache_path + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump((stamp, state), f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except Exception:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+
+class PhoneticTable(_CachedTable):
     """Reader for HIME phonetic table files (.tab2)"""
 
     def __init__(self, filepath):
         self.filepath = filepath
         self.idx_pho = []  # List of PhoIdx
         self.ch_pho = []   # List of PhoItem
+        self.resolved = []  # Display string for each ch_pho entry
+        self._by_key = {}  # phokey -> tuple of candidates, most used first
         self.phrase_area = b''
         self.idxnum_pho = 0
         self.ch_phoN = 0
 
-        self._load()
+        self._load_cached()
 
     def _load(self):
         """Load phonetic table from file"""
         with open(self.filepath, 'rb') as f:
-            # Read header
-            # Note: idxnum_pho is read twice (historical quirk)
-            self.idxnum_pho = struct.unpack('<H', f.read(2))[0]
-            self.idxnum_pho = struct.unpack('<H', f.read(2))[0]
-            self.ch_phoN = struct.unpack('<I', f.read(4))[0]
-            phrase_area_sz = struct.unpack('<I', f.read(4))[0]
-
-            # Read index array
-            # PHO_IDX: phokey_t (u_short) + u_short start = 4 bytes
-            for _ in range(self.idxnum_pho):
-                key, start = struct.unpack('<HH', f.read(4))
-                self.idx_pho.append(PhoIdx(key, start))
-
-            # Add sentinel entry
-            self.idx_pho.append(PhoIdx(0xFFFF, self.ch_phoN))
-
-            # Read character array
-            # PHO_ITEM: char[CH_SZ] + int count = 4 + 4 = 8 bytes
-            for _ in range(self.ch_phoN):
-                ch_bytes = f.read(CH_SZ)
-                count = struct.unpack('<I', f.read(4))[0]
-                # Decode UTF-8 character, strip null bytes
-                try:
-                    ch = ch_bytes.rstrip(b'\x00').decode('utf-8')
-                except UnicodeDecodeError:
-                    ch = ch_bytes.rstrip(b'\x00').decode('latin-1')
-                self.ch_pho.append(PhoItem(ch, count))
-
-            # Read phrase area
-            if phrase_area_sz > 0:
-                self.phrase_area = f.read(phrase_area_sz)
+            data = f.read()
+        view = memoryview(data)
+
+        # Read header
+        # Note: idxnum_pho is stored twice (historical quirk), the second wins
+        _, self.idxnum_pho, self.ch_phoN, phrase_area_sz = \
+            struct.unpack_from('<HHII', data, 0)
+        offset = 12
+
+        # Read index array in one block
+        # PHO_IDX: phokey_t (u_short) + u_short start = 4 bytes
+        end = offset + self.idxnum_pho * 4
+        self.idx_pho = list(map(PhoIdx._make,
+                                struct.iter_unpack('<HH', view[offset:end])))
+        offset = end
+
+        # Add sentinel entry
+        self.idx_pho.append(PhoIdx(0xFFFF, self.ch_phoN))
+
+        # Read character array in one block
+        # PHO_ITEM: char[CH_SZ] + int count = 4 + 4 = 8 bytes
+        end = offset + self.ch_phoN * (CH_SZ + 4)
+        items = list(struct.iter_unpack('<%dsI' % CH_SZ, view[offset:end]))
+        self.ch_pho = [PhoItem(_decode_ch(ch_bytes), count)
+                       for ch_bytes, count in items]
+        offset = end
+
+        # Read phrase area
+        if phrase_area_sz > 0:
+            self.phrase_area = data[offset:offset + phrase_area_sz]
+
+        # Resolve every entry (including phrase escapes) to its display
+        # string once, so get_char() is a plain list index
+        phrases = self._index_phrases()
+        self.resolved = [self._resolve(ch_bytes, phrases) for ch_bytes, _ in items]
+
+        # Group the sorted candidates of every key once, so lookup() is a
+        # single dict probe; walk backwards so the first of any duplicate
+        # keys wins, as with a binary search
+        self._by_key = {}
+        for i in range(len(self.idx_pho) - 2, -1, -1):
+            self._by_key[self.idx_pho[i].key] = self._candidates(i)
+
+    def _index_phrases(self):
+        """Map each phrase start offset to its decoded string in one pass"""
+        phrases = {}
+        offset = 0
+        for raw in self.phrase_area.split(b'\x00'):
+            try:
+                phrases[offset] = raw.decode('utf-8')
+            except UnicodeDecodeError:
+                phrases[offset] = ''
+            offset += len(raw) + 1
+        return phrases
+
+    def _resolve(self, ch_bytes, phrases):
+        """Resolve a raw PHO_ITEM character cell to its display string"""
+        if ch_bytes[0] != PHO_PHRASE_ESCAPE:
+            return _decode_ch(ch_bytes)
+
+        # Phrase escape: the remaining 3 bytes are a little-endian offset
+        # into the phrase area (see pho_idx_str2() in src/pho-util.c)
+        offset = ch_bytes[1] | (ch_bytes[2] << 8) | (ch_bytes[3] << 16)
+        phrase = phrases.get(offset)
+        if phrase is not None:
+            return phrase
+
+        # Offset into the middle of a phrase; scan for its terminator
+        end = self.phrase_area.find(b'\x00', offset)
+        if end == -1:
+            end = len(self.phrase_area)
+        try:
+            return self.phrase_area[offset:end].decode('utf-8')
+        except UnicodeDecodeError:
+            return ''
 
     def get_char(self, idx):
         """Get character at index, handling phrase escapes"""
-        if idx < 0 or idx >= len(self.ch_pho):
+        if idx < 0 or idx >= len(self.resolved):
             return ''
-
-        item = self.ch_pho[idx]
-        ch = item.ch
-
-        # Check for phrase escape
-        if ch and ord(ch[0]) == PHO_PHRASE_ESCAPE:
-            # Extract phrase offset from remaining bytes
-            raw = self.ch_pho[idx]
-            ch_bytes = raw.ch.encode('latin-1') if isinstance(raw.ch, str) else raw.ch
-            if len(ch_bytes) >= 4:
-                offset = ch_bytes[1] | (ch_bytes[2] << 8) | (ch_bytes[3] << 16)
-                # Extract phrase from phrase area
-                end = self.phrase_area.find(b'\x00', offset)
-                if end == -1:
-                    end = len(self.phrase_area)
-                try:
-                    return self.phrase_area[offset:end].decode('utf-8')
-                except:
-                    return ''
-
-        return ch
+        return self.resolved[idx]
 
     def lookup(self, phokey):
         """Look up characters for a phonetic key"""
-        results = []
+        return list(self.lookup_shared(phokey))
+
+    def lookup_shared(self, phokey):
+        """Like lookup(), but return the shared tuple itself (no copy)"""
+        return self._by_key.get(phokey, ())
+
+    def _candidates(self, i):
+        """Collect and sort the candidates of idx_pho entry i"""
+        start = self.idx_pho[i].start
+        end = self.idx_pho[i + 1].start
+        results = [(ch, item.count) for ch, item
+                   in zip(self.resolved[start:end], self.ch_pho[start:end]) if ch]
 
-        # Binary search for the key in idx_pho
-        for i, idx in enumerate(self.idx_pho[:-1]):
-            if idx.key == phokey:
-                # Found matching key, get all characters
-                start = idx.start
-                end = self.idx_pho[i + 1].start
-                for j in range(start, end):
-                    ch = self.get_char(j)
-                    if ch:
-                        count = self.ch_pho[j].count
-                        results.append((ch, count))
-                break
-            elif idx.key > phokey:
-                break
-
-        # Sort by usage count (descending)
-        results.sort(key=lambda x: -x[1])
-        return [ch for ch, _ in results]
-
-
-class KeyboardMapping:
+        # Sort by usage count (descending); the sort is stable for ties
+        results.sort(key=itemgetter(1), reverse=True)
+        return tuple(ch for ch, _ in results)
+
+
+class KeyboardMapping(_CachedTable):
     """Reader for HIME keyboard mapping files (.kbm)"""
 
     def __init__(self, filepath):
@@ -133,21 +218,21 @@ class KeyboardMapping:
         # slot: 0-2 (up to 3 mappings per key)
         self.phokbm = [[None, None, None] for _ in range(128)]
 
-        self._load()
+        self._load_cached()
 
     def _load(self):
         """Load keyboard mapping from file"""
+        # PHOKBM structure: char selkeyN + phokbm[128][3] of {char num, char typ}
         with open(self.filepath, 'rb') as f:
-            # PHOKBM structure: char selkeyN + phokbm[128][3] of {char num, char typ}
-            self.selkeyN = struct.unpack('<B', f.read(1))[0]
+            data = f.read(1 + 128 * 3 * 2)
+
+        self.selkeyN = data[0]
 
-            # Read the mapping array
-            for key in range(128):
-                for slot in range(3):
-                    num = struct.unpack('<b', f.read(1))[0]
-                    typ = struct.unpack('<b', f.read(1))[0]
-                    if num != 0:
-                        self.phokbm[key][slot] = KeyMapping(num, typ)
+        # Read the whole mapping array with one unpack
+        values = struct.unpack_from('<768b', data, 1)
+        for i, (num, typ) in enumerate(zip(values[0::2], values[1::2])):
+            if num != 0:
+                self.phokbm[i // 3][i % 3] = KeyMapping(num, typ)
 
     def get_mapping(self, key):
         """Get phonetic mapping for a key (ASCII code)"""
@@ -156,7 +241,7 @@ class KeyboardMapping:
         return []
 
 
-class GenericTable:
+class GenericTable(_CachedTable):
     """Reader for HIME generic table files (.gtab)"""
 
     def __init__(self, filepath):
@@ -171,39 +256,32 @@ class GenericTable:
         self.key64 = False
         self.keybits = 5
 
-        self._load()
+        self._load_cached()
 
     def _load(self):
         """Load generic table from file"""
-        with open(self.filepath, 'rb') as f:
-            # Read TableHead structure
-            version = struct.unpack('<I', f.read(4))[0]
-            flag = struct.unpack('<I', f.read(4))[0]
-            cname_bytes = f.read(32)
+        with open(self.filepath, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # Read TableHead structure with one unpack
+            (version, flag, cname_bytes, selkey_bytes, space_style,
+             self.KeyS, self.MaxPress, M_DUP_SEL, self.DefChars) = \
+                struct.unpack_from(TABLE_HEAD_FMT, mm, 0)
             self.cname = cname_bytes.rstrip(b'\x00').decode('utf-8', errors='replace')
-            selkey_bytes = f.read(12)
             self.selkey = selkey_bytes.rstrip(b'\x00').decode('ascii', errors='replace')
-            space_style = struct.unpack('<I', f.read(4))[0]
-            self.KeyS = struct.unpack('<I', f.read(4))[0]
-            self.MaxPress = struct.unpack('<I', f.read(4))[0]
-            M_DUP_SEL = struct.unpack('<I', f.read(4))[0]
-            self.DefChars = struct.unpack('<I', f.read(4))[0]
+            offset = struct.calcsize(TABLE_HEAD_FMT)
 
             # Skip QUICK_KEYS (large array)
             # quick1: 46 * 10 * CH_SZ = 1840 bytes
             # quick2: 46 * 46 * 10 * CH_SZ = 84640 bytes
             quick_keys_size = 46 * 10 * CH_SZ + 46 * 46 * 10 * CH_SZ
-            f.seek(quick_keys_size, 1)
+            offset += quick_keys_size
 
-            # Read endkey and keybits from union
-            endkey_bytes = f.read(99)
-            self.keybits = struct.unpack('<B', f.read(1))[0]
+            # Read endkey and keybits from union (padded to 128 bytes)
+            endkey_bytes, self.keybits, selkey2_bytes = \
+                struct.unpack_from('<99sB10s', mm, offset)
             if self.keybits == 0:
                 self.keybits = 5  # Default
-            selkey2_bytes = f.read(10)
-
-            # Padding to 128 bytes for union
-            f.read(128 - 99 - 1 - 10)
+            offset += 128
 
             # Determine if 64-bit keys
             self.key64 = (self.keybits * self.MaxPress > 32)
@@ -217,21 +295,15 @@ class GenericTable:
             # For simplicity, we'll just read what we can
             # The actual keyname and table reading is complex
 
-            # Read ITEM or ITEM64 array
-            item_size = 8 if not self.key64 else 12  # key[4/8] + ch[4]
-
-            for _ in range(self.DefChars):
-                if self.key64:
-                    key_bytes = f.read(8)
-                    key = struct.unpack('<Q', key_bytes)[0]
-                else:
-                    key_bytes = f.read(4)
-                    key = struct.unpack('<I', key_bytes)[0]
+            # Read ITEM or ITEM64 array in one block
+            item_fmt = '<Q4s' if self.key64 else '<I4s'  # key[4/8] + ch[4]
+            item_size = struct.calcsize(item_fmt)
+            raw = mm[offset:offset + self.DefChars * item_size]
 
-                ch_bytes = f.read(CH_SZ)
+            for key, ch_bytes in struct.iter_unpack(item_fmt, raw):
                 try:
                     ch = ch_bytes.rstrip(b'\x00').decode('utf-8')
-                except:
+                except UnicodeDecodeError:
                     ch = ''
 
                 if ch:
@@ -282,24 +354,22 @@ def pho2key(typ_pho):
     if typ_pho[0] == 24:  # BACK_QUOTE_NO
         return (24 << 9) | typ_pho[1]
 
-    key = typ_pho[0]
-    for i in range(1, 4):
-        key = typ_pho[i] | (key << TYP_PHO_LEN[i])
+    # Segments are packed as 5+2+4+3 bits (TYP_PHO_LEN), most significant first
+    return (typ_pho[0] << 9) | (typ_pho[1] << 7) | (typ_pho[2] << 3) | typ_pho[3]
+
 
-    return key
+def packed_pho2key(state):
+    """Convert typ_pho packed one byte per segment (initial lowest) to phokey_t"""
+    initial = state & 0xFF
+    medial = (state >> 8) & 0xFF
+    if initial == 24:  # BACK_QUOTE_NO
+        return (24 << 9) | medial
+    return (initial << 9) | (medial << 7) | (((state >> 16) & 0xFF) << 3) | (state >> 24)
 
 
 def key_typ_pho(phokey):
     """Convert phokey_t to 4-segment phonetic array"""
-    rtyp_pho = [0, 0, 0, 0]
-    rtyp_pho[3] = phokey & 7
-    phokey >>= 3
-    rtyp_pho[2] = phokey & 0xF
-    phokey >>= 4
-    rtyp_pho[1] = phokey & 0x3
-    phokey >>= 2
-    rtyp_pho[0] = phokey
-    return rtyp_pho
+    return [phokey >> 9, (phokey >> 7) & 0x3, (phokey >> 3) & 0xF, phokey & 7]
 
 
 # Bopomofo display characters
@@ -318,14 +388,13 @@ BOPOMOFO_CHARS = [
 ]
 
 
+@lru_cache(maxsize=4096)
 def phokey_to_str(phokey):
-    """Convert phonetic key to Bopomofo display string"""
-    typ_pho = key_typ_pho(phokey)
-    result = ''
-
-    for i in range(4):
-        idx = typ_pho[i]
-        if idx > 0 and idx < len(BOPOMOFO_CHARS[i]):
-            result += BOPOMOFO_CHARS[i][idx]
-
-    return result
+    """Convert phonetic key to Bopomofo display string
+
+    The phokey space is small (16 bits, far fewer in use), so results are
+    memoized.
+    """
+    return ''.join(chars[idx]
+                   for chars, idx in zip(BOPOMOFO_CHARS, key_typ_pho(phokey))
+                   if 0 < idx < len(chars))
@@ -5,63 +5,87 @@ Core phonetic (Bopomofo/Zhuyin) input engine for HIME.
 """
 
 import os
+from types import MappingProxyType
 from .hime_data import (
     PhoneticTable, KeyboardMapping,
-    pho2key, key_typ_pho, phokey_to_str,
+    packed_pho2key, key_typ_pho, phokey_to_str,
     find_data_dir, BOPOMOFO_CHARS, TYP_PHO_LEN
 )
 
 
 # Standard Zhuyin keyboard layout (zo.kbm equivalent)
-# Maps ASCII keys to (num, typ) pairs for phonetic components
-STANDARD_ZHUYIN_MAP = {
+# Maps ASCII keys to the (num, typ) pair of their phonetic component.
+# Read-only: _KEY_TABLE below is derived from it at import time.
+STANDARD_ZHUYIN_MAP = MappingProxyType({
     # Row 1: 1234567890-=
-    '1': [(1, 0)],   # ㄅ
-    'q': [(2, 0)],   # ㄆ
-    'a': [(3, 0)],   # ㄇ
-    'z': [(4, 0)],   # ㄈ
-    '2': [(5, 0)],   # ㄉ
-    'w': [(6, 0)],   # ㄊ
-    's': [(7, 0)],   # ㄋ
-    'x': [(8, 0)],   # ㄌ
-    'e': [(9, 0)],   # ㄍ
-    'd': [(10, 0)],  # ㄎ
-    'c': [(11, 0)],  # ㄏ
-    'r': [(12, 0)],  # ㄐ
-    'f': [(13, 0)],  # ㄑ
-    'v': [(14, 0)],  # ㄒ
-    '5': [(15, 0)],  # ㄓ
-    't': [(16, 0)],  # ㄔ
-    'g': [(17, 0)],  # ㄕ
-    'b': [(18, 0)],  # ㄖ
-    'y': [(19, 0)],  # ㄗ
-    'h': [(20, 0)],  # ㄘ
-    'n': [(21, 0)],  # ㄙ
+    '1': (1, 0),   # ㄅ
+    'q': (2, 0),   # ㄆ
+    'a': (3, 0),   # ㄇ
+    'z': (4, 0),   # ㄈ
+    '2': (5, 0),   # ㄉ
+    'w': (6, 0),   # ㄊ
+    's': (7, 0),   # ㄋ
+    'x': (8, 0),   # ㄌ
+    'e': (9, 0),   # ㄍ
+    'd': (10, 0),  # ㄎ
+    'c': (11, 0),  # ㄏ
+    'r': (12, 0),  # ㄐ
+    'f': (13, 0),  # ㄑ
+    'v': (14, 0),  # ㄒ
+    '5': (15, 0),  # ㄓ
+    't': (16, 0),  # ㄔ
+    'g': (17, 0),  # ㄕ
+    'b': (18, 0),  # ㄖ
+    'y': (19, 0),  # ㄗ
+    'h': (20, 0),  # ㄘ
+    'n': (21, 0),  # ㄙ
     # Medials
-    'u': [(1, 1)],   # ㄧ
-    'j': [(2, 1)],   # ㄨ
-    'm': [(3, 1)],   # ㄩ
+    'u': (1, 1),   # ㄧ
+    'j': (2, 1),   # ㄨ
+    'm': (3, 1),   # ㄩ
     # Finals
-    '8': [(1, 2)],   # ㄚ
-    'i': [(2, 2)],   # ㄛ
-    'k': [(3, 2)],   # ㄜ
-    ',': [(4, 2)],   # ㄝ
-    '9': [(5, 2)],   # ㄞ
-    'o': [(6, 2)],   # ㄟ
-    'l': [(7, 2)],   # ㄠ
-    '.': [(8, 2)],   # ㄡ
-    '0': [(9, 2)],   # ㄢ
-    'p': [(10, 2)],  # ㄣ
-    ';': [(11, 2)],  # ㄤ
-    '/': [(12, 2)],  # ㄥ
-    '-': [(13, 2)],  # ㄦ
+    '8': (1, 2),   # ㄚ
+    'i': (2, 2),   # ㄛ
+    'k': (3, 2),   # ㄜ
+    ',': (4, 2),   # ㄝ
+    '9': (5, 2),   # ㄞ
+    'o': (6, 2),   # ㄟ
+    'l': (7, 2),   # ㄠ
+    '.': (8, 2),   # ㄡ
+    '0': (9, 2),   # ㄢ
+    'p': (10, 2),  # ㄣ
+    ';': (11, 2),  # ㄤ
+    '/': (12, 2),  # ㄥ
+    '-': (13, 2),  # ㄦ
     # Tones
-    '3': [(2, 3)],   # ˊ (2nd tone)
-    '4': [(3, 3)],   # ˇ (3rd tone)
-    '6': [(4, 3)],   # ˋ (4th tone)
-    '7': [(5, 3)],   # ˙ (neutral tone)
-    ' ': [(1, 3)],   # (1st tone / space to select)
-}
+    '3': (2, 3),   # ˊ (2nd tone)
+    '4': (3, 3),   # ˇ (3rd tone)
+    '6': (4, 3),   # ˋ (4th tone)
+    '7': (5, 3),   # ˙ (neutral tone)
+    ' ': (1, 3),   # (1st tone / space to select)
+})
+
+
+def _state_update(num, typ):
+    """(keep_mask, bits) that store num into slot typ of the packed state"""
+    shift = typ << 3
+    return (0xFFFFFFFF ^ (0xFF << shift), num << shift)
+
+
+# STANDARD_ZHUYIN_MAP indexed by ASCII code, pre-evaluated to the
+# (keep_mask, bits) update of PhoneticEngine._state, or None.
+# Upper case letters share the lower case entry, so no .lower() is needed.
+_KEY_TABLE = tuple(
+    _state_update(*STANDARD_ZHUYIN_MAP[k]) if k in STANDARD_ZHUYIN_MAP else None
+    for k in (chr(c).lower() for c in range(128)))
+
+# Candidate selection keys; _SEL_KEY_TABLE gives the position on the page
+# for each ASCII code, or -1
+SEL_KEYS = '1234567890'
+_SEL_KEY_TABLE = tuple(SEL_KEYS.find(chr(c)) for c in range(128))
+
+# Candidate pages split per lookup; more are split as the user pages down
+PREFETCH_PAGES = 4
 
 
 class PhoneticEngine:
@@ -73,24 +97,34 @@ class PhoneticEngine:
         self.kbm = None
 
         # Current input state
-        self.typ_pho = [0, 0, 0, 0]  # [initial, medial, final, tone]
-        self.inph = [0, 0, 0, 0]     # Input keys for each position
+        # typ_pho packed one byte per slot: initial, medial, final, tone
+        # from the least significant byte up
+        self._state = 0
+        self._preedit_cache = None  # get_preedit() result for _state
         self.candidates = []
+        self._pages = []  # leading candidates_per_page chunks split so far
+        self._page_count = 0
         self.candidate_page = 0
         self.candidates_per_page = 10
 
         # Selection keys
-        self.sel_keys = '1234567890'
+        self.sel_keys = SEL_KEYS
 
         self._load_data()
 
     def _load_data(self):
         """Load phonetic table and keyboard mapping"""
+        # One directory listing instead of a stat() per candidate file
+        try:
+            available = set(os.listdir(self.data_dir))
+        except OSError:
+            available = set()
+
         # Try to load phonetic table
         pho_files = ['pho.tab2', 's-pho.tab2', 'pho-huge.tab2']
         for fname in pho_files:
-            path = os.path.join(self.data_dir, fname)
-            if os.path.exists(path):
+            if fname in available:
+                path = os.path.join(self.data_dir, fname)
                 try:
                     self.pho_table = PhoneticTable(path)
                     break
@@ -100,8 +134,8 @@ class PhoneticEngine:
         # Try to load keyboard mapping
         kbm_files = ['zo.kbm', 'et.kbm']
         for fname in kbm_files:
-            path = os.path.join(self.data_dir, fname)
-            if os.path.exists(path):
+            if fname in available:
+                path = os.path.join(self.data_dir, fname)
                 try:
                     self.kbm = KeyboardMapping(path)
                     break
@@ -110,27 +144,35 @@ class PhoneticEngine:
 
     def reset(self):
         """Reset input state"""
-        self.typ_pho = [0, 0, 0, 0]
-        self.inph = [0, 0, 0, 0]
+        self._state = 0
+        self._preedit_cache = None
         self.candidates = []
+        self._pages = []
+        self._page_count = 0
         self.candidate_page = 0
 
+    @property
+    def typ_pho(self):
+        """Current [initial, medial, final, tone] components"""
+        state = self._state
+        return [state & 0xFF, (state >> 8) & 0xFF, (state >> 16) & 0xFF, state >> 24]
+
     def is_empty(self):
         """Check if no phonetic input has been entered"""
-        return all(p == 0 for p in self.typ_pho)
+        return self._state == 0
 
     def get_preedit(self):
         """Get current preedit string (Bopomofo display)"""
-        if self.is_empty():
-            return ''
-
-        result = ''
-        for i in range(4):
-            idx = self.typ_pho[i]
-            if idx > 0 and idx < len(BOPOMOFO_CHARS[i]):
-                result += BOPOMOFO_CHARS[i][idx]
-
-        return result
+        preedit = self._preedit_cache
+        if preedit is None:
+            # typ_pho only ever holds STANDARD_ZHUYIN_MAP values, which are
+            # in range, and slot 0 of every row is ''
+            initials, medials, finals, tones = BOPOMOFO_CHARS
+            state = self._state
+            preedit = self._preedit_cache = (
+                initials[state & 0xFF] + medials[(state >> 8) & 0xFF] +
+                finals[(state >> 16) & 0xFF] + tones[state >> 24])
+        return preedit
 
     def process_key(self, key_char):
         """
@@ -140,108 +182,110 @@ class PhoneticEngine:
             key_char: Single character key pressed
 
         Returns:
-            tuple: (handled, commit_string, show_candidates)
+            tuple: (handled, commit_string, show_candidates, preedit, candidates)
                 - handled: True if key was consumed
                 - commit_string: String to commit (if any)
                 - show_candidates: True if candidate window should be shown
+                - preedit: Preedit string after the key
+                - candidates: Current candidate page if show_candidates, else []
         """
-        key = key_char.lower()
+        code = ord(key_char) if len(key_char) == 1 else 0
+        if code >= 0x80:
+            # Non-ASCII keys only count if they lower case into the layout
+            key = key_char.lower()
+            code = ord(key) if len(key) == 1 and key < '\x80' else 0
 
         # Check for candidate selection
-        if self.candidates and key in self.sel_keys:
-            idx = self.sel_keys.index(key)
-            page_start = self.candidate_page * self.candidates_per_page
-            actual_idx = page_start + idx
-            if actual_idx < len(self.candidates):
-                commit = self.candidates[actual_idx]
+        if self.candidates:
+            # The selection key position indexes the current page directly
+            idx = _SEL_KEY_TABLE[code]
+            page = self._pages[self.candidate_page]
+            if 0 <= idx < len(page):
+                commit = page[idx]
                 self.reset()
-                return (True, commit, False)
+                return (True, commit, False, '', [])
 
         # Check for standard Zhuyin mapping
-        if key in STANDARD_ZHUYIN_MAP:
-            mappings = STANDARD_ZHUYIN_MAP[key]
-            for num, typ in mappings:
-                self._insert_phonetic(num, typ, key)
+        entry = _KEY_TABLE[code]
+        if entry:
+            # Insert and overwrite mode both just replace the slot
+            keep_mask, bits = entry
+            self._state = (self._state & keep_mask) | bits
+            self._preedit_cache = None
 
             # Check if we have a complete syllable (has tone or space pressed)
-            if self.typ_pho[3] != 0 or key == ' ':
+            if self._state >> 24 or code == 0x20:
                 self._lookup_candidates()
                 if len(self.candidates) == 1:
                     # Auto-select if only one candidate
                     commit = self.candidates[0]
                     self.reset()
-                    return (True, commit, False)
+                    return (True, commit, False, '', [])
                 elif len(self.candidates) > 0:
-                    return (True, '', True)
+                    return (True, '', True, self.get_preedit(), self.get_candidates())
 
-            return (True, '', False)
+            return (True, '', False, self.get_preedit(), [])
 
         # Handle Escape to cancel
         if key_char == '\x1b':  # Escape
             self.reset()
-            return (True, '', False)
+            return (True, '', False, '', [])
 
         # Handle Backspace
         if key_char == '\x08':  # Backspace
             if not self.is_empty():
                 self._delete_last()
-                return (True, '', False)
-            return (False, '', False)
-
-        return (False, '', False)
-
-    def _insert_phonetic(self, num, typ, key):
-        """Insert a phonetic component"""
-        # Find the max filled position
-        max_in_idx = -1
-        for i in range(3, -1, -1):
-            if self.typ_pho[i]:
-                max_in_idx = i
-                break
-
-        # Try insert mode (fill empty slots in order)
-        if typ > max_in_idx:
-            self.typ_pho[typ] = num
-            self.inph[typ] = ord(key)
-        else:
-            # Overwrite mode
-            self.typ_pho[typ] = num
-            self.inph[typ] = ord(key)
+                return (True, '', False, self.get_preedit(), [])
+            return (False, '', False, '', [])
+
+        return (False, '', False, self.get_preedit(), [])
 
     def _delete_last(self):
         """Delete the last entered phonetic component"""
-        # Find and clear the last non-zero component
-        for i in range(3, -1, -1):
-            if self.typ_pho[i]:
-                self.typ_pho[i] = 0
-                self.inph[i] = 0
-                break
+        # Clear the highest non-zero component
+        if self._state:
+            i = (self._state.bit_length() - 1) >> 3
+            self._state &= ~(0xFF << (i << 3))
 
+        self._preedit_cache = None
         self.candidates = []
+        self._pages = []
+        self._page_count = 0
         self.candidate_page = 0
 
     def _lookup_candidates(self):
         """Look up candidates for current phonetic input"""
         self.candidates = []
+        self._pages = []
+        self._page_count = 0
         self.candidate_page = 0
 
         if self.is_empty():
             return
 
         # Generate phonetic key
-        phokey = pho2key(self.typ_pho)
+        phokey = packed_pho2key(self._state)
 
         if self.pho_table:
-            self.candidates = self.pho_table.lookup(phokey)
+            # The engine never mutates candidates, so share the table's tuple
+            self.candidates = self.pho_table.lookup_shared(phokey)
+            self._page_count = -(-len(self.candidates) // self.candidates_per_page)
+            self._fetch_more(PREFETCH_PAGES - 1)
+
+    def _fetch_more(self, page):
+        """Split candidates into pages up to and including page"""
+        # Long candidate lists are only paged through occasionally, so
+        # pages are built in batches as page_down() reaches them
+        n = self.candidates_per_page
+        stop = min(page + 1, self._page_count) * n
+        for i in range(len(self._pages) * n, stop, n):
+            self._pages.append(list(self.candidates[i:i + n]))
 
     def get_candidates(self):
         """Get current page of candidates"""
-        if not self.candidates:
+        if not self._pages:
             return []
-
-        start = self.candidate_page * self.candidates_per_page
-        end = start + self.candidates_per_page
-        return self.candidates[start:end]
+        return self._pages[self.candidate_page]
 
     def page_up(self):
         """Move to previous candidate page"""
@@ -252,9 +296,10 @@ class PhoneticEngine:
 
     def page_down(self):
         """Move to next candidate page"""
-        max_page = (len(self.candidates) - 1) // self.candidates_per_page
-        if self.candidate_page < max_page:
+        if self.candidate_page < self._page_count - 1:
             self.candidate_page += 1
+            if self.candidate_page == len(self._pages):
+                self._fetch_more(self.candidate_page + PREFETCH_PAGES - 1)
             return True
         return False
 
@@ -300,9 +345,8 @@ class HIMEInputEngine:
             return (False, '', '', [], False)
 
         if self.current_mode == 'phonetic':
-            handled, commit, show_cands = self.phonetic_engine.process_key(key_char)
-            preedit = self.phonetic_engine.get_preedit()
-            candidates = self.phonetic_engine.get_candidates() if show_cands else []
+            handled, commit, show_cands, preedit, candidates = \
+                self.phonetic_engine.process_key(key_char)
             return (handled, commit, preedit, candidates, show_cands)
 
         return (False, '', '', [], False)
@@ -50,6 +50,17 @@ class HIMETextService(TextService):
         self.show_cands = False
         self.icon_dir = os.path.dirname(__file__)
 
+        # onKeyDown() handlers for non-character keys
+        self._key_handlers = {
+            VK_ESCAPE: self._on_escape,
+            VK_BACK: self._on_backspace,
+            VK_RETURN: self._on_return,
+            VK_PRIOR: self._on_page_up,
+            VK_NEXT: self._on_page_down,
+            VK_UP: self._on_page_up,
+            VK_DOWN: self._on_page_down,
+        }
+
     def onActivate(self):
         """Called when the input method is activated"""
         super().onActivate()
@@ -91,12 +102,12 @@ class HIMETextService(TextService):
             # Handle modifier keys
             keyCode = keyEvent.keyCode
 
-            # Shift alone toggles Chinese/English mode
-            if keyCode == VK_SHIFT and not keyEvent.isKeyDown(VK_CONTROL) and not keyEvent.isKeyDown(VK_MENU):
-                return False  # Let onKeyDown handle it
+            # Query the modifier state once for both checks below
+            modified = keyEvent.isKeyDown(VK_CONTROL) or keyEvent.isKeyDown(VK_MENU)
 
-            # Control/Alt combos pass through
-            if keyEvent.isKeyDown(VK_CONTROL) or keyEvent.isKeyDown(VK_MENU):
+            # Shift alone toggles Chinese/English mode (onKeyDown handles
+            # it), and Control/Alt combos pass through
+            if keyCode == VK_SHIFT or modified:
                 return False
 
             # Process printable characters and navigation keys
@@ -128,58 +139,10 @@ class HIMETextService(TextService):
         if not self.engine.chinese_mode:
             return False
 
-        # Handle Escape
-        if keyCode == VK_ESCAPE:
-            if self.isComposing() or self.show_cands:
-                self.engine.reset()
-                self._clear_composition()
-                return True
-            return False
-
-        # Handle Backspace
-        if keyCode == VK_BACK:
-            if self.isComposing():
-                handled, commit, preedit, cands, show = self.engine.process_key('\x08')
-                self._update_display(preedit, cands, show)
-                return True
-            return False
-
-        # Handle Enter
-        if keyCode == VK_RETURN:
-            preedit = self.engine.get_preedit()
-            if preedit:
-                # Commit preedit as-is
-                self.setCommitString(preedit)
-                self.engine.reset()
-                self._clear_composition()
-                return True
-            return False
-
-        # Handle Page Up/Down in candidate window
-        if keyCode == VK_PRIOR:
-            if self.show_cands and self.engine.page_up():
-                self._update_candidates()
-                return True
-            return False
-
-        if keyCode == VK_NEXT:
-            if self.show_cands and self.engine.page_down():
-                self._update_candidates()
-                return True
-            return False
-
-        # Handle Up/Down arrows for candidate selection
-        if keyCode == VK_UP:
-            if self.show_cands and self.engine.page_up():
-                self._update_candidates()
-                return True
-            return False
-
-        if keyCode == VK_DOWN:
-            if self.show_cands and self.engine.page_down():
-                self._update_candidates()
-                return True
-            return False
+        # Escape, Backspace, Enter and paging keys
+        handler = self._key_handlers.get(keyCode)
+        if handler:
+            return handler()
 
         # Handle character input
         if charCode and keyEvent.isPrintableChar():
@@ -196,6 +159,46 @@ class HIMETextService(TextService):
 
         return False
 
+    def _on_escape(self):
+        """Cancel the composition"""
+        if self.isComposing() or self.show_cands:
+            self.engine.reset()
+            self._clear_composition()
+            return True
+        return False
+
+    def _on_backspace(self):
+        """Delete the last phonetic component"""
+        if self.isComposing():
+            handled, commit, preedit, cands, show = self.engine.process_key('\x08')
+            self._update_display(preedit, cands, show)
+            return True
+        return False
+
+    def _on_return(self):
+        """Commit the preedit as-is"""
+        preedit = self.engine.get_preedit()
+        if preedit:
+            self.setCommitString(preedit)
+            self.engine.reset()
+            self._clear_composition()
+            return True
+        return False
+
+    def _on_page_up(self):
+        """Show the previous candidate page (Page Up / Up)"""
+        if self.show_cands and self.engine.page_up():
+            self._update_candidates()
+            return True
+        return False
+
+    def _on_page_down(self):
+        """Show the next candidate page (Page Down / Down)"""
+        if self.show_cands and self.engine.page_down():
+            self._update_candidates()
+            return True
+        return False
+
     def onKeyUp(self, keyEvent):
         """Process key up event"""
         return False
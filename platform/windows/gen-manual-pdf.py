@@ -9,9 +9,14 @@ Output:
     windows/HIME-Manual.pdf
 """
 
+import functools
+import hashlib
 import os
+import pickle
 import sys
 
+import reportlab
+
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm, cm
 from reportlab.lib.colors import (
@@ -23,6 +28,7 @@ from reportlab.platypus import (
     SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle,
     PageBreak, KeepTogether, Image, HRFlowable,
 )
+from reportlab.lib import rl_accel
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 
@@ -34,45 +40,77 @@ ICONS_DIR = os.path.join(SCRIPT_DIR, "icons")
 ROOT_ICONS = os.path.join(SCRIPT_DIR, "..", "icons")
 OUTPUT_PDF = os.path.join(SCRIPT_DIR, "HIME-Manual.pdf")
 
+# ReportLab measures and escapes text with the optional _rl_accel C
+# extension (pip install rl_accel) when it is importable, and falls back
+# to much slower pure-Python versions otherwise.
+RL_ACCEL = rl_accel.instanceStringWidthTTF.__module__ != rl_accel.__name__
+
 # ---------------------------------------------------------------------------
 # CJK Font Registration
 # ---------------------------------------------------------------------------
 # Register a CJK font alongside Helvetica. Latin text stays in Helvetica
 # (proper bold/italic), CJK characters are wrapped in <font> tags via the
 # cjk() helper below.
-_CJK_FONT_CANDIDATES = [
+# Font directories per sys.platform (may contain %VAR% references), and
+# the CJK fonts to look for in them, in order of preference. Directories
+# are scanned recursively, since distributions disagree on the layout
+# below /usr/share/fonts.
+_CJK_FONT_DIRS = {
+    "linux": ("/usr/share/fonts",),
+    "darwin": ("/System/Library/Fonts", "/Library/Fonts"),
+    "win32": (r"%SystemRoot%\Fonts", r"C:\Windows\Fonts"),
+}
+_CJK_FONT_NAMES = (
     # Linux
-    "/usr/share/fonts/truetype/droid/DroidSansFallbackFull.ttf",
-    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
-    "/usr/share/fonts/truetype/noto/NotoSansCJK-Regular.ttc",
-    "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    "DroidSansFallbackFull.ttf",
+    "NotoSansCJK-Regular.ttc",
     # macOS
-    "/System/Library/Fonts/PingFang.ttc",
-    "/System/Library/Fonts/STHeiti Light.ttc",
-    "/Library/Fonts/Arial Unicode.ttf",
+    "PingFang.ttc",
+    "STHeiti Light.ttc",
+    "Arial Unicode.ttf",
     # Windows
-    os.path.expandvars(r"%SystemRoot%\Fonts\msjh.ttc"),
-    os.path.expandvars(r"%SystemRoot%\Fonts\msyh.ttc"),
-    os.path.expandvars(r"%SystemRoot%\Fonts\mingliu.ttc"),
-    os.path.expandvars(r"%SystemRoot%\Fonts\simsun.ttc"),
-    r"C:\Windows\Fonts\msjh.ttc",
-    r"C:\Windows\Fonts\msyh.ttc",
-]
+    "msjh.ttc",
+    "msyh.ttc",
+    "mingliu.ttc",
+    "simsun.ttc",
+)
+
+def _find_fonts(dirs, names):
+    """Map each of names found below dirs to its path, one scandir per dir."""
+    found = {}
+    pending = [os.path.expandvars(d) for d in dirs]
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.name in names:
+                    found.setdefault(entry.name, entry.path)
+    return found
 
 CJK_FONT = "HimeCJK"
 _cjk_available = False
 
-for _font_path in _CJK_FONT_CANDIDATES:
-    if os.path.exists(_font_path):
-        try:
-            if _font_path.endswith(".ttc"):
-                pdfmetrics.registerFont(TTFont(CJK_FONT, _font_path, subfontIndex=0))
-            else:
-                pdfmetrics.registerFont(TTFont(CJK_FONT, _font_path))
-            _cjk_available = True
-            break
-        except Exception as e:
-            print(f"Warning: failed to load font {_font_path}: {e}")
+# Only scan this platform's font directories; unknown platforms scan them all
+_font_dirs = _CJK_FONT_DIRS.get(sys.platform) or [
+    d for dirs in _CJK_FONT_DIRS.values() for d in dirs
+]
+_fonts_found = _find_fonts(_font_dirs, set(_CJK_FONT_NAMES))
+
+for _font_path in [_fonts_found[n] for n in _CJK_FONT_NAMES if n in _fonts_found]:
+    try:
+        if _font_path.endswith(".ttc"):
+            pdfmetrics.registerFont(TTFont(CJK_FONT, _font_path, subfontIndex=0))
+        else:
+            pdfmetrics.registerFont(TTFont(CJK_FONT, _font_path))
+        _cjk_available = True
+        break
+    except Exception as e:
+        print(f"Warning: failed to load font {_font_path}: {e}")
 
 if not _cjk_available:
     print("WARNING: No CJK font found. Chinese characters may not render correctly.")
@@ -89,6 +127,14 @@ C_MID_GRAY = HexColor("#666666")
 C_TABLE_HEAD = HexColor("#2E5A88")
 C_TABLE_ALT = HexColor("#EEF2F7")
 C_KEY_BG = HexColor("#E8E8E8")
+C_NEUTRAL_BG = HexColor("#F0F0F0")   # English mode, toolbar
+# Input mode accents (border, background) for the mode cycle diagram
+C_ZHUYIN = HexColor("#005AB4")
+C_ZHUYIN_BG = HexColor("#E8F0FF")
+C_CANGJIE = HexColor("#00823C")
+C_CANGJIE_BG = HexColor("#E8FFE8")
+C_BOSHIAMY = HexColor("#B45A00")
+C_BOSHIAMY_BG = HexColor("#FFF0E0")
 
 # ---------------------------------------------------------------------------
 # Styles
@@ -181,11 +227,117 @@ S_COVER_CHAR = ParagraphStyle(
     spaceAfter=2*mm,
 )
 
+# ---------------------------------------------------------------------------
+# Table styles
+# ---------------------------------------------------------------------------
+# Built once and shared: Table.setStyle() only reads the commands.
+
+# Header row plus zebra-striped body, shared by make_table()
+TS_DATA = TableStyle([
+    ("BACKGROUND", (0, 0), (-1, 0), C_TABLE_HEAD),
+    ("TEXTCOLOR", (0, 0), (-1, 0), white),
+    ("ALIGN", (0, 0), (-1, 0), "CENTER"),
+    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+    ("GRID", (0, 0), (-1, -1), 0.5, lightgrey),
+    ("ROWBACKGROUNDS", (0, 1), (-1, -1), [white, C_TABLE_ALT]),
+    ("TOPPADDING", (0, 0), (-1, -1), 4),
+    ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+    ("LEFTPADDING", (0, 0), (-1, -1), 6),
+    ("RIGHTPADDING", (0, 0), (-1, -1), 6),
+])
+
+# Cover icon row
+TS_ICON_ROW = TableStyle([
+    ("ALIGN", (0,0), (-1,-1), "CENTER"),
+    ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
+])
+
+# Table of contents
+TS_TOC = TableStyle([
+    ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
+    ("TOPPADDING", (0,0), (-1,-1), 3),
+    ("BOTTOMPADDING", (0,0), (-1,-1), 3),
+    ("LINEBELOW", (0,0), (-1,-1), 0.3, lightgrey),
+])
+
+# Ctrl+` mode cycle diagram
+TS_MODE_CYCLE = TableStyle([
+    ("ALIGN", (0,0), (-1,-1), "CENTER"),
+    ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
+    ("BOX", (0,0), (0,0), 1, C_PRIMARY),
+    ("BOX", (2,0), (2,0), 1, C_ZHUYIN),
+    ("BOX", (4,0), (4,0), 1, C_CANGJIE),
+    ("BOX", (6,0), (6,0), 1, C_BOSHIAMY),
+    ("BOX", (8,0), (8,0), 1, C_PRIMARY),
+    ("BACKGROUND", (0,0), (0,0), C_NEUTRAL_BG),
+    ("BACKGROUND", (2,0), (2,0), C_ZHUYIN_BG),
+    ("BACKGROUND", (4,0), (4,0), C_CANGJIE_BG),
+    ("BACKGROUND", (6,0), (6,0), C_BOSHIAMY_BG),
+    ("BACKGROUND", (8,0), (8,0), C_NEUTRAL_BG),
+])
+
+# Settings checkbox list
+TS_SETTINGS = TableStyle([
+    ("GRID", (0,0), (-1,-1), 0.5, lightgrey),
+    ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
+    ("ROWBACKGROUNDS", (0,0), (-1,-1), [white, C_TABLE_ALT]),
+    ("TOPPADDING", (0,0), (-1,-1), 4),
+    ("BOTTOMPADDING", (0,0), (-1,-1), 4),
+    ("LEFTPADDING", (0,0), (-1,-1), 6),
+])
+
+# About box
+TS_ABOUT = TableStyle([
+    ("BOX", (0,0), (-1,-1), 1, C_PRIMARY),
+    ("BACKGROUND", (0,0), (-1,-1), C_LIGHT_BG),
+    ("TOPPADDING", (0,0), (-1,-1), 8),
+    ("BOTTOMPADDING", (0,0), (-1,-1), 8),
+    ("LEFTPADDING", (0,0), (-1,-1), 12),
+])
+
+# Floating toolbar mock-up and its labels
+TS_TOOLBAR = TableStyle([
+    ("BOX", (0,0), (-1,-1), 2, C_PRIMARY),
+    ("INNERGRID", (0,0), (-1,-1), 0.5, lightgrey),
+    ("ALIGN", (0,0), (-1,-1), "CENTER"),
+    ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
+    ("BACKGROUND", (0,0), (-1,-1), C_NEUTRAL_BG),
+    ("TOPPADDING", (0,0), (-1,-1), 6),
+    ("BOTTOMPADDING", (0,0), (-1,-1), 6),
+])
+
+TS_TOOLBAR_LABELS = TableStyle([
+    ("ALIGN", (0,0), (-1,-1), "CENTER"),
+    ("TOPPADDING", (0,0), (-1,-1), 2),
+    ("TEXTCOLOR", (0,0), (-1,-1), C_MID_GRAY),
+])
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 import re
 
+# Match runs of CJK Unified Ideographs, CJK symbols, Bopomofo,
+# fullwidth forms, and CJK punctuation
+_CJK_RE = re.compile(
+    r'([\u2E80-\u2FFF'   # CJK radicals, Kangxi
+    r'\u3000-\u303F'      # CJK symbols and punctuation
+    r'\u3100-\u312F'      # Bopomofo
+    r'\u31A0-\u31BF'      # Bopomofo Extended
+    r'\u3400-\u4DBF'      # CJK Extension A
+    r'\u4E00-\u9FFF'      # CJK Unified Ideographs
+    r'\uF900-\uFAFF'      # CJK Compatibility
+    r'\uFE30-\uFE4F'      # CJK Compatibility Forms
+    r'\uFF00-\uFFEF'      # Fullwidth Forms
+    r'\U00020000-\U0002A6DF'  # CJK Extension B
+    r']+)'
+)
+_CJK_REPL = rf'<font face="{CJK_FONT}">\1</font>'
+
+# Cells such as "→" and "☑" repeat across tables. Paragraphs keep layout
+# state from wrap(), so they can't be shared; cache the markup instead.
+# The manual's text is a fixed, bounded set, so the cache is unbounded.
+@functools.lru_cache(maxsize=None)
 def cjk(text):
     """Wrap CJK characters in <font> tags so they render with the CJK font.
 
@@ -193,35 +345,21 @@ def cjk(text):
     the registered CJK font for Chinese/Japanese/Korean characters.
     Returns the original text unchanged if no CJK font is available.
     """
-    if not _cjk_available:
+    # Most fragments are plain ASCII; isascii() is a single C-level scan
+    if not _cjk_available or text.isascii():
         return text
-    # Match runs of CJK Unified Ideographs, CJK symbols, Bopomofo,
-    # fullwidth forms, and CJK punctuation
-    _CJK_RE = re.compile(
-        r'([\u2E80-\u2FFF'   # CJK radicals, Kangxi
-        r'\u3000-\u303F'      # CJK symbols and punctuation
-        r'\u3100-\u312F'      # Bopomofo
-        r'\u31A0-\u31BF'      # Bopomofo Extended
-        r'\u3400-\u4DBF'      # CJK Extension A
-        r'\u4E00-\u9FFF'      # CJK Unified Ideographs
-        r'\uF900-\uFAFF'      # CJK Compatibility
-        r'\uFE30-\uFE4F'      # CJK Compatibility Forms
-        r'\uFF00-\uFFEF'      # Fullwidth Forms
-        r'\U00020000-\U0002A6DF'  # CJK Extension B
-        r']+)'
-    )
-    return _CJK_RE.sub(
-        rf'<font face="{CJK_FONT}">\1</font>', text
-    )
+    return _CJK_RE.sub(_CJK_REPL, text)
+
 
+# List each icon directory once; icon_path() is then set lookups only
+_icons = set(os.listdir(ICONS_DIR)) if os.path.isdir(ICONS_DIR) else set()
+_root_icons = set(os.listdir(ROOT_ICONS)) if os.path.isdir(ROOT_ICONS) else set()
 
 def icon_path(name):
-    p = os.path.join(ICONS_DIR, name)
-    if os.path.exists(p):
-        return p
-    p2 = os.path.join(ROOT_ICONS, name)
-    if os.path.exists(p2):
-        return p2
+    if name in _icons:
+        return os.path.join(ICONS_DIR, name)
+    if name in _root_icons:
+        return os.path.join(ROOT_ICONS, name)
     return None
 
 def img_or_none(name, w=12*mm, h=12*mm):
@@ -234,36 +372,30 @@ def hr():
     return HRFlowable(width="100%", thickness=0.5, color=lightgrey,
                        spaceBefore=2*mm, spaceAfter=2*mm)
 
-def kbd(key):
-    """Render a keyboard key inline."""
-    return f'<font face="Courier" size="10" color="#333333"><b>&nbsp;{key}&nbsp;</b></font>'
+# Parsing the markup is most of a Paragraph's construction cost, and table
+# headers and cells repeat. The parsed frags are only read during layout,
+# so one parse can back every Paragraph with the same text and style.
+@functools.lru_cache(maxsize=None)
+def _parse_markup(markup, style):
+    p = Paragraph(markup, style)
+    return p.text, p.style, p.bulletText, p.frags
 
 def P(text, style):
     """Create a Paragraph with CJK characters auto-wrapped."""
-    return Paragraph(cjk(text), style)
+    text, style, bullet, frags = _parse_markup(cjk(text), style)
+    return Paragraph(text, style, bulletText=bullet, frags=frags)
 
 
 def make_table(headers, rows, col_widths=None):
-    """Create a styled table."""
+    """Create a styled table. Header and row cells must be strings."""
     data = [[P(h, S_TH) for h in headers]]
+    # First column is left-aligned, the rest centered
+    col_styles = [S_TD_L] + [S_TD] * (len(headers) - 1)
     for row in rows:
-        data.append([P(str(c), S_TD_L if i == 0 else S_TD)
-                      for i, c in enumerate(row)])
+        data.append([P(c, s) for c, s in zip(row, col_styles)])
 
     t = Table(data, colWidths=col_widths, repeatRows=1)
-    style_cmds = [
-        ("BACKGROUND", (0, 0), (-1, 0), C_TABLE_HEAD),
-        ("TEXTCOLOR", (0, 0), (-1, 0), white),
-        ("ALIGN", (0, 0), (-1, 0), "CENTER"),
-        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-        ("GRID", (0, 0), (-1, -1), 0.5, lightgrey),
-        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [white, C_TABLE_ALT]),
-        ("TOPPADDING", (0, 0), (-1, -1), 4),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
-        ("LEFTPADDING", (0, 0), (-1, -1), 6),
-        ("RIGHTPADDING", (0, 0), (-1, -1), 6),
-    ]
-    t.setStyle(TableStyle(style_cmds))
+    t.setStyle(TS_DATA)
     return t
 
 # ---------------------------------------------------------------------------
@@ -272,24 +404,80 @@ def make_table(headers, rows, col_widths=None):
 def _on_first_page(canvas, doc):
     pass  # Cover page — no header/footer
 
-def _on_later_pages(canvas, doc):
-    canvas.saveState()
+_PAGE_CHROME = "HimePageChrome"
+
+def _draw_page_chrome(canvas):
+    """Record the constant header/footer once as a shared form XObject."""
+    w, h = A4
+    canvas.beginForm(_PAGE_CHROME)
     canvas.setFont("Helvetica", 8)
     canvas.setFillColor(C_MID_GRAY)
-    w, h = A4
     canvas.drawString(20*mm, 10*mm, "HIME Input Method Editor — User Manual")
-    canvas.drawRightString(w - 20*mm, 10*mm, f"Page {doc.page}")
     # Top line
     canvas.setStrokeColor(lightgrey)
     canvas.setLineWidth(0.5)
     canvas.line(20*mm, h - 18*mm, w - 20*mm, h - 18*mm)
     # Bottom line
     canvas.line(20*mm, 14*mm, w - 20*mm, 14*mm)
+    canvas.endForm()
+
+def _on_later_pages(canvas, doc):
+    if not canvas.hasForm(_PAGE_CHROME):
+        _draw_page_chrome(canvas)
+    canvas.saveState()
+    canvas.doForm(_PAGE_CHROME)
+    # Only the page number differs between pages
+    canvas.setFont("Helvetica", 8)
+    canvas.setFillColor(C_MID_GRAY)
+    canvas.drawRightString(A4[0] - 20*mm, 10*mm, f"Page {doc.page}")
     canvas.restoreState()
 
 # ---------------------------------------------------------------------------
 # Content builder
 # ---------------------------------------------------------------------------
+CACHE_DIR = os.path.join(SCRIPT_DIR, ".cache")
+CACHE_PATH = os.path.join(CACHE_DIR, "story.pkl")
+
+def _cached_story(build):
+    """Reuse the pickled story while this script, its icons and whether a
+    CJK font was found are unchanged.
+
+    Flowables are pickled before layout, so loading them skips the
+    Paragraph markup parser; doc.build() still wraps and draws as usual.
+    CACHE_PATH holds the key followed by the story, so a stale entry is
+    simply overwritten.
+    """
+    @functools.wraps(build)
+    def wrapper():
+        h = hashlib.blake2b(digest_size=16)
+        with open(__file__, "rb") as f:
+            h.update(f.read())
+        h.update(f"{reportlab.Version}|{_cjk_available}|".encode())
+        for d, names in ((ICONS_DIR, _icons), (ROOT_ICONS, _root_icons)):
+            for name in sorted(names):
+                st = os.stat(os.path.join(d, name))
+                h.update(f"{name}:{st.st_size}:{st.st_mtime_ns}|".encode())
+        key = h.hexdigest()
+
+        try:
+            with open(CACHE_PATH, "rb") as f:
+                if pickle.load(f) == key:
+                    return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            pass
+
+        story = build()
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(CACHE_PATH, "wb") as f:
+                pickle.dump(key, f, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(story, f, pickle.HIGHEST_PROTOCOL)
+        except (OSError, pickle.PicklingError, TypeError) as e:
+            print(f"Warning: could not cache content: {e}")
+        return story
+    return wrapper
+
+@_cached_story
 def build_content():
     story = []
 
@@ -302,20 +490,11 @@ def build_content():
 
     # Icon row
     icon_names = ["juyin.png", "cj5.png", "noseeing.png", "hime-tray.png"]
-    icon_imgs = []
-    for name in icon_names:
-        img = img_or_none(name, w=16*mm, h=16*mm)
-        if img:
-            icon_imgs.append(img)
-        else:
-            icon_imgs.append(P("?", S_BODY_C))
-    if icon_imgs:
-        t = Table([icon_imgs], colWidths=[30*mm]*len(icon_imgs))
-        t.setStyle(TableStyle([
-            ("ALIGN", (0,0), (-1,-1), "CENTER"),
-            ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
-        ]))
-        story.append(t)
+    icon_imgs = [img_or_none(name, w=16*mm, h=16*mm) or P("?", S_BODY_C)
+                 for name in icon_names]
+    t = Table([icon_imgs], colWidths=[30*mm]*len(icon_imgs))
+    t.setStyle(TS_ICON_ROW)
+    story.append(t)
 
     story.append(Spacer(1, 15*mm))
     story.append(P(
@@ -352,12 +531,7 @@ def build_content():
             P(page, S_TD),
         ])
     toc_t = Table(toc_data, colWidths=[12*mm, 110*mm, 15*mm])
-    toc_t.setStyle(TableStyle([
-        ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
-        ("TOPPADDING", (0,0), (-1,-1), 3),
-        ("BOTTOMPADDING", (0,0), (-1,-1), 3),
-        ("LINEBELOW", (0,0), (-1,-1), 0.3, lightgrey),
-    ]))
+    toc_t.setStyle(TS_TOC)
     story.append(toc_t)
     story.append(PageBreak())
 
@@ -423,12 +597,6 @@ def build_content():
         S_BODY,
     ))
 
-    story.append(P("2.2 System Tray Icons", S_H2))
-    story.append(P(
-        "When HIME is active, two icons appear in the system tray area:",
-        S_BODY,
-    ))
-
     tray_headers = ["Icon", "Meaning"]
     tray_rows = [
         ["姬 (purple)", "HIME app icon — right-click for menu"],
@@ -437,7 +605,11 @@ def build_content():
         ["蝦 (orange)", "Boshiamy (嘸蝦米) mode active"],
         ["EN (gray)", "English passthrough mode"],
     ]
-    story.append(make_table(tray_headers, tray_rows, col_widths=[40*mm, 100*mm]))
+    story.append(KeepTogether([
+        P("2.2 System Tray Icons", S_H2),
+        P("When HIME is active, two icons appear in the system tray area:", S_BODY),
+        make_table(tray_headers, tray_rows, col_widths=[40*mm, 100*mm]),
+    ]))
 
     story.append(P("2.3 Quick Mode Switching", S_H2))
     story.append(P(
@@ -527,20 +699,7 @@ def build_content():
          P("<b>EN</b><br/>...", S_TD)],
     ]
     cycle_t = Table(cycle_data, colWidths=[20*mm, 8*mm, 20*mm, 8*mm, 20*mm, 8*mm, 20*mm, 8*mm, 20*mm])
-    cycle_t.setStyle(TableStyle([
-        ("ALIGN", (0,0), (-1,-1), "CENTER"),
-        ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
-        ("BOX", (0,0), (0,0), 1, C_PRIMARY),
-        ("BOX", (2,0), (2,0), 1, HexColor("#005AB4")),
-        ("BOX", (4,0), (4,0), 1, HexColor("#00823C")),
-        ("BOX", (6,0), (6,0), 1, HexColor("#B45A00")),
-        ("BOX", (8,0), (8,0), 1, C_PRIMARY),
-        ("BACKGROUND", (0,0), (0,0), HexColor("#F0F0F0")),
-        ("BACKGROUND", (2,0), (2,0), HexColor("#E8F0FF")),
-        ("BACKGROUND", (4,0), (4,0), HexColor("#E8FFE8")),
-        ("BACKGROUND", (6,0), (6,0), HexColor("#FFF0E0")),
-        ("BACKGROUND", (8,0), (8,0), HexColor("#F0F0F0")),
-    ]))
+    cycle_t.setStyle(TS_MODE_CYCLE)
     story.append(cycle_t)
     story.append(Spacer(1, 3*mm))
     story.append(P(
@@ -566,13 +725,8 @@ def build_content():
         S_BODY,
     ))
 
-    story.append(P("4.1 Keyboard Layout", S_H2))
-    story.append(P(
-        "The standard Zhuyin keyboard layout maps Bopomofo symbols to letter keys:",
-        S_BODY,
-    ))
-
-    # Keyboard layout table - row 1 (number row)
+    # Keyboard layout table: number row, home row and bottom row groups,
+    # laid out as a single table so column widths are solved once
     kb_headers = ["Key", "Symbol", "Key", "Symbol", "Key", "Symbol", "Key", "Symbol"]
 
     kb_row1 = [
@@ -582,28 +736,26 @@ def build_content():
         ["7", "˙", "u", "ㄧ", "8", "ㄚ", "i", "ㄛ"],
         ["9", "ㄞ", "o", "ㄟ", "0", "ㄢ", "p", "ㄣ"],
     ]
-    story.append(make_table(kb_headers, kb_row1,
-                            col_widths=[12*mm, 14*mm]*4))
 
     kb_row2 = [
         ["a", "ㄇ", "s", "ㄋ", "d", "ㄎ", "f", "ㄑ"],
         ["g", "ㄕ", "h", "ㄘ", "j", "ㄨ", "k", "ㄜ"],
         ["l", "ㄠ", ";", "ㄤ", "-", "ㄦ", "", ""],
     ]
-    story.append(Spacer(1, 2*mm))
-    story.append(make_table(kb_headers, kb_row2,
-                            col_widths=[12*mm, 14*mm]*4))
 
     kb_row3 = [
         ["z", "ㄈ", "x", "ㄌ", "c", "ㄏ", "v", "ㄒ"],
         ["b", "ㄖ", "n", "ㄙ", "m", "ㄩ", ",", "ㄝ"],
         [".", "ㄡ", "/", "ㄥ", "", "", "", ""],
     ]
-    story.append(Spacer(1, 2*mm))
-    story.append(make_table(kb_headers, kb_row3,
-                            col_widths=[12*mm, 14*mm]*4))
+    story.append(KeepTogether([
+        P("4.1 Keyboard Layout", S_H2),
+        P("The standard Zhuyin keyboard layout maps Bopomofo symbols to letter keys:",
+          S_BODY),
+        make_table(kb_headers, kb_row1 + kb_row2 + kb_row3,
+                   col_widths=[12*mm, 14*mm]*4),
+    ]))
 
-    story.append(P("4.2 Tone Keys", S_H2))
     tone_headers = ["Key", "Tone", "Name", "Example"]
     tone_rows = [
         ["Space", "First (ˉ)", "陰平 yīnpíng", "媽 mā"],
@@ -612,8 +764,11 @@ def build_content():
         ["4", "Fourth (ˋ)", "去聲 qùshēng", "罵 mà"],
         ["7", "Neutral (˙)", "輕聲 qīngshēng", "嗎 ma"],
     ]
-    story.append(make_table(tone_headers, tone_rows,
-                            col_widths=[18*mm, 28*mm, 42*mm, 30*mm]))
+    story.append(KeepTogether([
+        P("4.2 Tone Keys", S_H2),
+        make_table(tone_headers, tone_rows,
+                   col_widths=[18*mm, 28*mm, 42*mm, 30*mm]),
+    ]))
 
     story.append(P("4.3 Input Flow", S_H2))
     for i, step in enumerate([
@@ -624,7 +779,6 @@ def build_content():
     ], 1):
         story.append(P(f"<b>{i}.</b> {step}", S_BULLET))
 
-    story.append(P("4.4 Example: Typing 你好 (nǐ hǎo)", S_H2))
     example_headers = ["Step", "Keys", "Preedit", "Result"]
     example_rows = [
         ["1", "j (ㄋ) → u (ㄧ)", "[注]ㄋㄧ", "—"],
@@ -634,8 +788,11 @@ def build_content():
         ["5", "3 (third tone)", "[注]ㄏㄠˇ 1.好 2.郝", "—"],
         ["6", "1 (select)", "", "你好"],
     ]
-    story.append(make_table(example_headers, example_rows,
-                            col_widths=[14*mm, 40*mm, 46*mm, 20*mm]))
+    story.append(KeepTogether([
+        P("4.4 Example: Typing 你好 (nǐ hǎo)", S_H2),
+        make_table(example_headers, example_rows,
+                   col_widths=[14*mm, 40*mm, 46*mm, 20*mm]),
+    ]))
     story.append(PageBreak())
 
     # ===== 5. CANGJIE 5 (倉五) INPUT =====
@@ -648,11 +805,6 @@ def build_content():
         S_BODY,
     ))
 
-    story.append(P("5.1 Key Layout", S_H2))
-    story.append(P(
-        "Each letter A–Y maps to a Cangjie radical. Z is not used in standard Cangjie.",
-        S_BODY,
-    ))
     cj_headers = ["Key", "Radical", "Key", "Radical", "Key", "Radical", "Key", "Radical", "Key", "Radical"]
     cj_rows = [
         ["A", "日", "B", "月", "C", "金", "D", "木", "E", "水"],
@@ -661,8 +813,12 @@ def build_content():
         ["P", "心", "Q", "手", "R", "口", "S", "尸", "T", "廿"],
         ["U", "山", "V", "女", "W", "田", "X", "難", "Y", "卜"],
     ]
-    story.append(make_table(cj_headers, cj_rows,
-                            col_widths=[10*mm, 12*mm]*5))
+    story.append(KeepTogether([
+        P("5.1 Key Layout", S_H2),
+        P("Each letter A–Y maps to a Cangjie radical. Z is not used in standard Cangjie.",
+          S_BODY),
+        make_table(cj_headers, cj_rows, col_widths=[10*mm, 12*mm]*5),
+    ]))
 
     story.append(P("5.2 Input Flow", S_H2))
     for i, step in enumerate([
@@ -674,7 +830,6 @@ def build_content():
     ], 1):
         story.append(P(f"<b>{i}.</b> {step}", S_BULLET))
 
-    story.append(P("5.3 Examples", S_H2))
     cj_ex_headers = ["Character", "Code", "Keys", "Meaning"]
     cj_ex_rows = [
         ["明", "日月", "A B", "Bright"],
@@ -683,13 +838,13 @@ def build_content():
         ["國", "田戈口一", "W I R M", "Country"],
         ["你", "人弓火", "O N F", "You"],
     ]
-    story.append(make_table(cj_ex_headers, cj_ex_rows,
-                            col_widths=[20*mm, 28*mm, 28*mm, 30*mm]))
-    story.append(P(
-        "<i>The preedit display shows the method label and radicals: "
-        "[倉]竹手一 1.嗨</i>",
-        S_NOTE,
-    ))
+    story.append(KeepTogether([
+        P("5.3 Examples", S_H2),
+        make_table(cj_ex_headers, cj_ex_rows,
+                   col_widths=[20*mm, 28*mm, 28*mm, 30*mm]),
+        P("<i>The preedit display shows the method label and radicals: "
+          "[倉]竹手一 1.嗨</i>", S_NOTE),
+    ]))
     story.append(PageBreak())
 
     # ===== 6. BOSHIAMY (嘸蝦米) INPUT =====
@@ -794,14 +949,7 @@ def build_content():
          P("Boshiamy input (requires liu.gtab)", S_TD_L)],
     ]
     st = Table(settings_data, colWidths=[12*mm, 45*mm, 70*mm])
-    st.setStyle(TableStyle([
-        ("GRID", (0,0), (-1,-1), 0.5, lightgrey),
-        ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
-        ("ROWBACKGROUNDS", (0,0), (-1,-1), [white, C_TABLE_ALT]),
-        ("TOPPADDING", (0,0), (-1,-1), 4),
-        ("BOTTOMPADDING", (0,0), (-1,-1), 4),
-        ("LEFTPADDING", (0,0), (-1,-1), 6),
-    ]))
+    st.setStyle(TS_SETTINGS)
     story.append(st)
 
     story.append(P("8.2 Rules", S_H2))
@@ -830,13 +978,7 @@ def build_content():
         )]],
         colWidths=[100*mm],
     )
-    about_box.setStyle(TableStyle([
-        ("BOX", (0,0), (-1,-1), 1, C_PRIMARY),
-        ("BACKGROUND", (0,0), (-1,-1), C_LIGHT_BG),
-        ("TOPPADDING", (0,0), (-1,-1), 8),
-        ("BOTTOMPADDING", (0,0), (-1,-1), 8),
-        ("LEFTPADDING", (0,0), (-1,-1), 12),
-    ]))
+    about_box.setStyle(TS_ABOUT)
     story.append(about_box)
     story.append(PageBreak())
 
@@ -869,22 +1011,10 @@ def build_content():
          P("Settings", S_TD)],
     ]
     tb = Table(toolbar_data, colWidths=[24*mm, 24*mm, 24*mm])
-    tb.setStyle(TableStyle([
-        ("BOX", (0,0), (-1,-1), 2, C_PRIMARY),
-        ("INNERGRID", (0,0), (-1,-1), 0.5, lightgrey),
-        ("ALIGN", (0,0), (-1,-1), "CENTER"),
-        ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
-        ("BACKGROUND", (0,0), (-1,-1), HexColor("#F0F0F0")),
-        ("TOPPADDING", (0,0), (-1,-1), 6),
-        ("BOTTOMPADDING", (0,0), (-1,-1), 6),
-    ]))
+    tb.setStyle(TS_TOOLBAR)
     story.append(tb)
     tbl = Table(toolbar_labels, colWidths=[24*mm, 24*mm, 24*mm])
-    tbl.setStyle(TableStyle([
-        ("ALIGN", (0,0), (-1,-1), "CENTER"),
-        ("TOPPADDING", (0,0), (-1,-1), 2),
-        ("TEXTCOLOR", (0,0), (-1,-1), C_MID_GRAY),
-    ]))
+    tbl.setStyle(TS_TOOLBAR_LABELS)
     story.append(tbl)
 
     story.append(Spacer(1, 3*mm))
@@ -986,6 +1116,11 @@ def build_content():
 # Main
 # ---------------------------------------------------------------------------
 def main():
+    if RL_ACCEL:
+        print("Using ReportLab with the _rl_accel C extension")
+    else:
+        print("Using pure-Python ReportLab (install rl_accel for faster generation)")
+
     doc = SimpleDocTemplate(
         OUTPUT_PDF,
         pagesize=A4,
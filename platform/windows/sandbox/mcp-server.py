@@ -1,20 +1,38 @@
 #!/usr/bin/env python3
 """MCP server for interacting with HIME Windows Sandbox via file-based IPC.
 
-Zero-dependency (stdlib only). Communicates over stdio using JSON-RPC 2.0.
+Zero-dependency (stdlib only; uses orjson for the stdio messages when it is
+installed). Communicates over stdio using JSON-RPC 2.0.
 Writes .cmd.json files to a shared folder, polls for .resp.json replies
 from the sandbox-agent.ps1 running inside Windows Sandbox.
 """
 
+import itertools
 import json
 import os
 import sys
 import time
 import uuid
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    loads = orjson.loads
+    dumps = orjson.dumps
+else:
+    loads = json.loads
+
+    def dumps(obj):
+        return json.dumps(obj).encode()
+
 IPC_DIR = "/mnt/c/mu/tmp/hime-sandbox-ipc"
 POLL_INTERVAL = 0.3  # seconds
+MIN_POLL_INTERVAL = 0.01  # seconds
 COMMAND_TIMEOUT = 30  # seconds
+STALE_AGE = 2 * COMMAND_TIMEOUT  # seconds
 
 TOOLS = [
     {
@@ -100,13 +118,53 @@ TOOLS = [
     },
 ]
 
+TOOL_NAMES = frozenset(t["name"] for t in TOOLS)
+TOOLS_LIST_RESULT = {"tools": TOOLS}
 
-def send_command(tool, params):
-    """Write a command file and wait for the response."""
+
+_last_sweep = 0.0
+
+
+def sweep_stale_files():
+    """Delete replies that arrived after their command timed out, and
+    leftover .tmp files, so IPC_DIR stays small. Runs at most once per
+    STALE_AGE; directory scans over /mnt/c are slow.
+    """
+    global _last_sweep
+    now = time.time()
+    if now - _last_sweep < STALE_AGE:
+        return
+    _last_sweep = now
+
+    try:
+        entries = os.scandir(IPC_DIR)
+    except OSError:
+        return
+    with entries:
+        for entry in entries:
+            if not entry.name.endswith((".resp.json", ".cmd.tmp", ".resp.tmp")):
+                continue
+            try:
+                if now - entry.stat().st_mtime > STALE_AGE:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+
+def send_commands(calls):
+    """Write one command file for a list of (tool, params) calls and wait
+    for the response. Returns one result per call, in order.
+    """
     os.makedirs(IPC_DIR, exist_ok=True)
+    sweep_stale_files()
 
     cmd_id = uuid.uuid4().hex[:12]
-    cmd_data = {"tool": tool, "params": params}
+    if len(calls) == 1:
+        tool, params = calls[0]
+        cmd_data = {"tool": tool, "params": params}
+    else:
+        # The agent runs batched calls in order and replies once
+        cmd_data = {"batch": [{"tool": t, "params": p} for t, p in calls]}
 
     # Atomic write: .cmd.tmp -> .cmd.json
     tmp_path = os.path.join(IPC_DIR, f"{cmd_id}.cmd.tmp")
@@ -117,27 +175,57 @@ def send_command(tool, params):
         json.dump(cmd_data, f)
     os.rename(tmp_path, final_path)
 
-    # Poll for response
-    deadline = time.time() + COMMAND_TIMEOUT
+    # Poll for response. Inotify can't see files created from the Windows
+    # side of /mnt/c, so start with a short interval for quick commands
+    # and back off to POLL_INTERVAL for slow ones.
+    timeout = COMMAND_TIMEOUT * len(calls)
+    deadline = time.time() + timeout
+    interval = MIN_POLL_INTERVAL
     while time.time() < deadline:
-        if os.path.exists(resp_path):
-            # Small delay to ensure write is complete
-            time.sleep(0.05)
-            try:
-                with open(resp_path, "r", encoding="utf-8") as f:
-                    resp = json.load(f)
-                os.remove(resp_path)
-                return resp.get("result", {})
-            except (json.JSONDecodeError, IOError):
-                # File might still be in flight; retry
-                time.sleep(0.1)
-                continue
-        time.sleep(POLL_INTERVAL)
+        try:
+            with open(resp_path, "r", encoding="utf-8") as f:
+                resp = json.load(f)
+            os.remove(resp_path)
+        except FileNotFoundError:
+            time.sleep(interval)
+            interval = min(interval * 2, POLL_INTERVAL)
+            continue
+        except (json.JSONDecodeError, IOError):
+            # File might still be in flight; retry
+            time.sleep(0.1)
+            continue
+        # The agent publishes the reply with a rename, so it's complete
+        if "results" in resp:
+            return resp["results"]
+        return [resp.get("result", {})] * len(calls)
 
     # Timeout — clean up command file if still present
     if os.path.exists(final_path):
         os.remove(final_path)
-    return {"error": f"timeout waiting for sandbox response after {COMMAND_TIMEOUT}s"}
+    return [{"error": f"timeout waiting for sandbox response after {timeout}s"}] * len(calls)
+
+
+def send_command(tool, params):
+    """Write a command file and wait for the response."""
+    return send_commands([(tool, params)])[0]
+
+
+# How format_result() shows each known result field; other fields are left out
+RESULT_FORMATTERS = {
+    "host_path": lambda v: f"Host path (use Read tool to view): {v}",
+    "sandbox_path": lambda v: f"Sandbox path: {v}",
+    "width": lambda v: f"width: {v}",
+    "height": lambda v: f"height: {v}",
+    "content": str,
+    "stdout": lambda v: f"stdout:\n{v}" if v else None,
+    "stderr": lambda v: f"stderr:\n{v}" if v else None,
+    "exitcode": lambda v: f"exit code: {v}",
+    "clicked": lambda v: f"clicked: {v}",
+    "pressed": lambda v: f"pressed: {v}",
+    "typed": lambda v: f"typed: {v}",
+    "method": lambda v: f"method: {v}",
+    "path": lambda v: f"path: {v}",
+}
 
 
 def format_result(result):
@@ -151,27 +239,40 @@ def format_result(result):
     # Build text output based on tool result
     parts = []
     for key, value in result.items():
-        if key == "host_path":
-            parts.append(f"Host path (use Read tool to view): {value}")
-        elif key == "sandbox_path":
-            parts.append(f"Sandbox path: {value}")
-        elif key in ("width", "height"):
-            parts.append(f"{key}: {value}")
-        elif key == "content":
-            parts.append(str(value))
-        elif key == "stdout" and value:
-            parts.append(f"stdout:\n{value}")
-        elif key == "stderr" and value:
-            parts.append(f"stderr:\n{value}")
-        elif key == "exitcode":
-            parts.append(f"exit code: {value}")
-        elif key in ("clicked", "pressed", "typed", "method", "path"):
-            parts.append(f"{key}: {value}")
+        fmt = RESULT_FORMATTERS.get(key)
+        if fmt is not None:
+            text = fmt(value)
+            if text is not None:
+                parts.append(text)
 
     text = "\n".join(parts) if parts else json.dumps(result, indent=2)
     return {"content": [{"type": "text", "text": text}]}
 
 
+def tool_call_response(req_id, result):
+    """Wrap a sandbox result as the JSON-RPC response to a tools/call."""
+    return {
+        "jsonrpc": "2.0",
+        "id": req_id,
+        "result": format_result(result),
+    }
+
+
+def is_sandbox_call(req):
+    """Whether req is a tools/call that has to go to the sandbox."""
+    return (req is not None
+            and req.get("method") == "tools/call"
+            and req.get("params", {}).get("name", "") in TOOL_NAMES)
+
+
+def handle_sandbox_calls(reqs):
+    """Answer consecutive sandbox tools/call requests with one round trip."""
+    calls = [(r["params"]["name"], r["params"].get("arguments", {})) for r in reqs]
+    results = send_commands(calls)
+    return [tool_call_response(r.get("id"), result)
+            for r, result in zip(reqs, results)]
+
+
 def handle_request(req):
     """Handle a single JSON-RPC request."""
     method = req.get("method", "")
@@ -200,15 +301,14 @@ def handle_request(req):
         return {
             "jsonrpc": "2.0",
             "id": req_id,
-            "result": {"tools": TOOLS},
+            "result": TOOLS_LIST_RESULT,
         }
 
     if method == "tools/call":
         tool_name = params.get("name", "")
         tool_args = params.get("arguments", {})
 
-        known = {t["name"] for t in TOOLS}
-        if tool_name not in known:
+        if tool_name not in TOOL_NAMES:
             return {
                 "jsonrpc": "2.0",
                 "id": req_id,
@@ -219,11 +319,7 @@ def handle_request(req):
             }
 
         result = send_command(tool_name, tool_args)
-        return {
-            "jsonrpc": "2.0",
-            "id": req_id,
-            "result": format_result(result),
-        }
+        return tool_call_response(req_id, result)
 
     # Unknown method
     return {
@@ -233,29 +329,69 @@ def handle_request(req):
     }
 
 
+PARSE_ERROR = {
+    "jsonrpc": "2.0",
+    "id": None,
+    "error": {"code": -32700, "message": "Parse error"},
+}
+
+
+def write_all(fd, data):
+    """os.write() until all of data is written."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
 def main():
-    """Stdio JSON-RPC loop."""
-    for line in sys.stdin:
-        line = line.strip()
-        if not line:
-            continue
+    """Stdio JSON-RPC loop.
 
-        try:
-            req = json.loads(line)
-        except json.JSONDecodeError:
-            resp = {
-                "jsonrpc": "2.0",
-                "id": None,
-                "error": {"code": -32700, "message": "Parse error"},
-            }
-            sys.stdout.write(json.dumps(resp) + "\n")
-            sys.stdout.flush()
-            continue
+    Reads all input that is already pending at once and writes the replies
+    to a burst of requests together, instead of once per line. Replies go
+    straight to fd 1 with os.write(), bypassing sys.stdout's buffering.
+    """
+    fd_in = sys.stdin.fileno()
+    fd_out = sys.stdout.fileno()
+    pending = b""
+    replies = []
+    while True:
+        chunk = os.read(fd_in, 65536)
+        if chunk:
+            *lines, pending = (pending + chunk).split(b"\n")
+        else:
+            lines, pending = [pending], b""
+
+        reqs = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                reqs.append(loads(line))
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                reqs.append(None)
+
+        # Tool calls that arrived together share one sandbox round trip
+        for sandbox, group in itertools.groupby(reqs, key=is_sandbox_call):
+            if sandbox:
+                # These wait on the sandbox; send earlier replies first
+                if replies:
+                    write_all(fd_out, b"".join(replies))
+                    replies.clear()
+                resps = handle_sandbox_calls(list(group))
+            else:
+                resps = [PARSE_ERROR if req is None else handle_request(req)
+                         for req in group]
+
+            for resp in resps:
+                if resp is not None:
+                    replies.append(dumps(resp) + b"\n")
+
+        if replies:
+            write_all(fd_out, b"".join(replies))
+            replies.clear()
 
-        resp = handle_request(req)
-        if resp is not None:
-            sys.stdout.write(json.dumps(resp) + "\n")
-            sys.stdout.flush()
+        if not chunk:
+            break
 
 
 if __name__ == "__main__":
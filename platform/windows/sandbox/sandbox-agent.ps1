@@ -5,6 +5,7 @@ $ErrorActionPreference = 'Stop'
 $IpcDir = 'C:\hime-ipc'
 $ScreenshotDir = Join-Path $IpcDir 'screenshots'
 $PollIntervalMs = 500
+$MinPollIntervalMs = 10
 
 # --- P/Invoke for mouse and keyboard ---
 Add-Type -TypeDefinition @'
@@ -276,6 +277,18 @@ function Invoke-Key($params) {
     return @{ pressed = $combo }
 }
 
+function Invoke-Tool($tool, $params) {
+    switch ($tool) {
+        'sandbox_exec'       { Invoke-Exec $params }
+        'sandbox_screenshot' { Invoke-Screenshot $params }
+        'sandbox_read_file'  { Invoke-ReadFile $params }
+        'sandbox_click'      { Invoke-Click $params }
+        'sandbox_type'       { Invoke-Type $params }
+        'sandbox_key'        { Invoke-Key $params }
+        default              { @{ error = "unknown tool: $tool" } }
+    }
+}
+
 # --- Main loop ---
 
 Write-Host "HIME Sandbox Agent starting..."
@@ -293,6 +306,9 @@ Get-ChildItem -Path $IpcDir -Filter '*.resp.tmp' -ErrorAction SilentlyContinue |
 
 Write-Host "Agent ready. Polling for commands..."
 
+# Commands tend to come in bursts: poll quickly after one has been handled
+# and back off to $PollIntervalMs while idle
+$pollMs = $PollIntervalMs
 while ($true) {
     $cmdFiles = Get-ChildItem -Path $IpcDir -Filter '*.cmd.json' -ErrorAction SilentlyContinue
     foreach ($cmdFile in $cmdFiles) {
@@ -303,23 +319,32 @@ while ($true) {
             $raw = Get-Content -Path $cmdFile.FullName -Raw
             $cmd = $raw | ConvertFrom-Json
 
-            $tool = $cmd.tool
-            $params = $cmd.params
-
-            $result = switch ($tool) {
-                'sandbox_exec'       { Invoke-Exec $params }
-                'sandbox_screenshot' { Invoke-Screenshot $params }
-                'sandbox_read_file'  { Invoke-ReadFile $params }
-                'sandbox_click'      { Invoke-Click $params }
-                'sandbox_type'       { Invoke-Type $params }
-                'sandbox_key'        { Invoke-Key $params }
-                default              { @{ error = "unknown tool: $tool" } }
-            }
-
-            $response = @{
-                id     = $id
-                tool   = $tool
-                result = $result
+            if ($cmd.batch) {
+                # Several tool calls in one file: run them in order and
+                # answer with one result per call
+                $tool = 'batch'
+                $results = @(foreach ($call in $cmd.batch) {
+                    try {
+                        Invoke-Tool $call.tool $call.params
+                    } catch {
+                        @{ error = $_.Exception.Message }
+                    }
+                })
+
+                $response = @{
+                    id      = $id
+                    tool    = $tool
+                    results = $results
+                }
+            } else {
+                $tool = $cmd.tool
+                $result = Invoke-Tool $tool $cmd.params
+
+                $response = @{
+                    id     = $id
+                    tool   = $tool
+                    result = $result
+                }
             }
         } catch {
             $response = @{
@@ -340,5 +365,10 @@ while ($true) {
         Write-Host "  Done: $id"
     }
 
-    Start-Sleep -Milliseconds $PollIntervalMs
+    if ($cmdFiles) {
+        $pollMs = $MinPollIntervalMs
+    } else {
+        $pollMs = [Math]::Min($pollMs * 2, $PollIntervalMs)
+    }
+    Start-Sleep -Milliseconds $pollMs
 }
@@ -16,6 +16,9 @@ Usage:
     # Generate .cin and .gtab (requires hime-cin2gtab in PATH or repo)
     python3 liu-tab2cin.py /path/to/liu-uni.tab -o liu.cin --gtab
 
+    # Convert several tables at once (outputs are named after each input)
+    python3 liu-tab2cin.py /path/to/liu-uni*.tab --gtab
+
     # Custom table name and description
     python3 liu-tab2cin.py /path/to/liu-uni.tab -o liu.cin \\
         --ename liu --cname 嘸蝦米
@@ -28,8 +31,12 @@ Typical source files (from C:\\Program Files\\BoshiamyTIP\\):
 """
 
 import argparse
+import concurrent.futures
+import mmap
+import operator
 import os
 import shutil
+import struct
 import subprocess
 import sys
 
@@ -37,28 +44,17 @@ import sys
 # Binary format decoder
 # ---------------------------------------------------------------------------
 
-def _getint16(data, addr):
-    """Read a 16-bit little-endian integer."""
-    return data[addr] | (data[addr + 1] << 8)
-
-
-def _getbits(data, start, nbit, i):
-    """Read *nbit* bits for entry *i* from a packed bitfield at *start*."""
-    if nbit in (1, 2, 4):
-        byte_offset = int(start + i * nbit / 8)
-        byte_val = data[byte_offset]
-        shift = 8 - nbit - (i * nbit % 8)
-        return (byte_val >> shift) & ((1 << nbit) - 1)
-    elif nbit > 0 and nbit % 8 == 0:
-        nbyte = nbit // 8
-        value = 0
-        a = start + i * nbyte
-        for _ in range(nbyte):
-            value = (value << 8) | data[a]
-            a += 1
-        return value
-    else:
-        raise ValueError(f"unsupported nbit={nbit}")
+def _unpack2bits(data, start, n):
+    """Unpack *n* 2-bit fields, most significant first, packed from *start*."""
+    return [(b >> shift) & 3
+            for b in data[start:start + (n + 3) // 4] for shift in (6, 4, 2, 0)]
+
+
+def _unpack24bits(data, start, n):
+    """Unpack *n* big-endian 24-bit fields packed from *start*."""
+    packed = data[start:start + 3 * n]
+    return [(b0 << 16) | (b1 << 8) | b2
+            for b0, b1, b2 in zip(packed[0::3], packed[1::3], packed[2::3])]
 
 
 def decode_liu_tab(path):
@@ -66,15 +62,28 @@ def decode_liu_tab(path):
 
     Returns a list of (key, character) tuples sorted by key.
     """
-    with open(path, "rb") as f:
-        data = list(f.read())
-
-    i1 = _getint16(data, 0)
-    i2 = i1 + _getint16(data, 2)
-    i3 = i2 + _getint16(data, 6)
-    i4 = i3 + _getint16(data, 6)
+    # Map the file instead of reading it all: only the offset table and the
+    # two packed arrays the decoder uses get copied out of the page cache
+    with open(path, "rb") as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        # 1025 little-endian uint16 bucket offsets; bucket i holds entries
+        # offsets[i] to offsets[i + 1]. The first ones belong to buckets with
+        # a blank key0, which are never decoded, and double as the header.
+        offsets = struct.unpack_from("<1025H", data)
+        i1 = offsets[0]
+        i2 = i1 + offsets[1]
+        i3 = i2 + offsets[3]
+        i4 = i3 + offsets[3]
+
+        # Unpack the fields of every entry up front, in one pass over each
+        # packed array, rather than reading them per entry
+        n = max(offsets[33:])
+        his = _unpack2bits(data, i1, n)
+        bit24s = _unpack24bits(data, i4, n)
 
     rootkey = list(" abcdefghijklmnopqrstuvwxyz,.'[]")
+    # key2 and key3 are the 10 bits above lo; spell all 1024 pairs once
+    suffixes = [key2 + key3 for key2 in rootkey for key3 in rootkey]
 
     entries = []
     for i in range(1024):
@@ -82,23 +91,22 @@ def decode_liu_tab(path):
         key1 = rootkey[i % 32]
         if key0 == " ":
             continue
+        prefix = key0 + key1
 
-        start_ci = _getint16(data, i * 2)
-        end_ci = _getint16(data, i * 2 + 2)
-
-        for ci in range(start_ci, end_ci):
-            bit24 = _getbits(data, i4, 24, ci)
-            hi = _getbits(data, i1, 2, ci)
+        for ci in range(offsets[i], offsets[i + 1]):
+            bit24 = bit24s[ci]
+            hi = his[ci]
             lo = bit24 & 0x3FFF
 
-            key2 = rootkey[bit24 >> 19]
-            key3 = rootkey[(bit24 >> 14) & 0x1F]
-
-            key_str = (key0 + key1 + key2 + key3).strip()
+            # key0 is never a space, so only trailing spaces need stripping
+            key_str = (prefix + suffixes[bit24 >> 14]).rstrip()
             codepoint = (hi << 14) | lo
             if codepoint > 0:
                 entries.append((key_str, chr(codepoint)))
 
+    # Buckets come out in rootkey order, not key order. The sort is stable,
+    # so characters sharing a key keep the table's candidate order.
+    entries.sort(key=operator.itemgetter(0))
     return entries
 
 
@@ -152,8 +160,8 @@ def write_cin(entries, path, ename="liu", cname="\u5606\u8766\u861c"):
     """Write entries as a .cin table file."""
     with open(path, "w", encoding="utf-8") as f:
         f.write(CIN_HEADER_TEMPLATE.format(ename=ename, cname=cname))
-        for key, char in entries:
-            f.write(f"{key} {char}\n")
+        # Format the whole body first and hand it to the file in one write
+        f.write("".join([f"{key} {char}\n" for key, char in entries]))
         f.write("%chardef end\n")
 
 
@@ -192,19 +200,21 @@ def generate_gtab(cin_path):
     cin_dir = os.path.dirname(os.path.abspath(cin_path))
     cin_name = os.path.basename(cin_path)
 
+    # Let hime-cin2gtab's progress output go straight to our stdout; only
+    # stderr is captured, for the failure message
+    sys.stdout.flush()
     result = subprocess.run(
         [exe, cin_name],
         cwd=cin_dir,
-        capture_output=True,
-        text=True,
+        stderr=subprocess.PIPE,
     )
 
     if result.returncode != 0:
-        print(f"hime-cin2gtab failed:\n{result.stderr}", file=sys.stderr)
+        stderr = result.stderr.decode("utf-8", errors="replace")
+        print(f"hime-cin2gtab failed:\n{stderr}", file=sys.stderr)
         return False
 
     gtab_path = cin_path.rsplit(".", 1)[0] + ".gtab"
-    print(result.stdout, end="")
     print(f"Generated {gtab_path}")
     return True
 
@@ -219,12 +229,14 @@ def main():
     )
     parser.add_argument(
         "input",
-        help="Path to liu-uni.tab (or liu-uni2/3/4.tab)",
+        nargs="+",
+        help="Path(s) to liu-uni.tab (or liu-uni2/3/4.tab)",
     )
     parser.add_argument(
         "-o", "--output",
         default=None,
-        help="Output .cin path (default: <input-stem>.cin in current dir)",
+        help="Output .cin path; single input only "
+             "(default: <input-stem>.cin in current dir)",
     )
     parser.add_argument(
         "--gtab",
@@ -244,27 +256,39 @@ def main():
 
     args = parser.parse_args()
 
-    if not os.path.isfile(args.input):
-        print(f"Error: {args.input} not found", file=sys.stderr)
-        sys.exit(1)
-
-    # Default output name
-    if args.output is None:
-        stem = os.path.splitext(os.path.basename(args.input))[0]
-        args.output = stem + ".cin"
+    if args.output is not None and len(args.input) > 1:
+        parser.error("-o/--output can only be used with a single input")
 
-    # Decode
-    print(f"Decoding {args.input} ...")
-    entries = decode_liu_tab(args.input)
-    print(f"  {len(entries)} entries decoded")
+    for path in args.input:
+        if not os.path.isfile(path):
+            print(f"Error: {path} not found", file=sys.stderr)
+            sys.exit(1)
 
-    # Write .cin
-    write_cin(entries, args.output, ename=args.ename, cname=args.cname)
-    print(f"Generated {args.output}")
-
-    # Optionally generate .gtab
+    # Default output names
+    if args.output is not None:
+        outputs = [args.output]
+    else:
+        outputs = [os.path.splitext(os.path.basename(path))[0] + ".cin"
+                   for path in args.input]
+    if len(set(outputs)) != len(outputs):
+        parser.error("inputs with the same file name would write the same "
+                     ".cin; convert them separately with -o")
+
+    for path, output in zip(args.input, outputs):
+        # Decode
+        print(f"Decoding {path} ...")
+        entries = decode_liu_tab(path)
+        print(f"  {len(entries)} entries decoded")
+
+        # Write .cin
+        write_cin(entries, output, ename=args.ename, cname=args.cname)
+        print(f"Generated {output}")
+
+    # Optionally generate .gtab. Decoding takes milliseconds; hime-cin2gtab
+    # dominates, so run one per table concurrently.
     if args.gtab:
-        generate_gtab(args.output)
+        with concurrent.futures.ThreadPoolExecutor() as pool:
+            list(pool.map(generate_gtab, outputs))
 
 
 if __name__ == "__main__":